@@ -1,10 +1,41 @@
 """freeq.at — static site with markdown docs rendering."""
 
 import os
+import re
 import subprocess
+import threading
+from functools import lru_cache
+from html import escape, unescape
 from pathlib import Path
+from types import MappingProxyType
+
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from flask import (
+    Flask,
+    abort,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    send_file,
+    send_from_directory,
+)
+
+# Prefer cmarkgfm (compiled cmark-gfm, ~30x faster parse) and fall back to
+# python-markdown where the wheel isn't available.
+try:
+    import cmarkgfm
+except ImportError:
+    cmarkgfm = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-from flask import Flask, render_template, abort, send_from_directory, jsonify
 import markdown
 from markdown.extensions.codehilite import CodeHiliteExtension
 from markdown.extensions.fenced_code import FencedCodeExtension
@@ -13,6 +44,24 @@ from markdown.extensions.toc import TocExtension
 
 app = Flask(__name__)
 
+# Production: templates never change under a running worker, so skip the
+# per-request mtime check and compile every template at boot instead of on
+# each route's first hit. Only jinja_env is touched — setting
+# TEMPLATES_AUTO_RELOAD to an explicit False here would permanently win
+# over the debug setter and break reload-on-change under app.run(debug=True).
+if not app.debug:
+    app.jinja_env.auto_reload = False
+    for _tpl in (
+        "base.html",
+        "index.html",
+        "connect.html",
+        "sdk.html",
+        "about.html",
+        "docs_index.html",
+        "doc_page.html",
+    ):
+        app.jinja_env.get_template(_tpl)
+
 # Resolve git commit at startup (written by deploy.sh or read from git)
 _commit_file = Path(__file__).parent / ".git_commit"
 if _commit_file.exists():
@@ -30,7 +79,9 @@ else:
 SITE_DOCS_DIR = Path(__file__).parent / "docs"
 REPO_DOCS_DIR = Path(__file__).parent.parent / "docs"
 
-# Markdown renderer
+# Markdown renderer (python-markdown fallback path). One shared instance —
+# extension registration is a measurable cost per construction — guarded by
+# a lock since gunicorn threaded workers may render concurrently.
 MD_EXTENSIONS = [
     FencedCodeExtension(),
     CodeHiliteExtension(css_class="highlight", guess_lang=False),
@@ -38,22 +89,128 @@ MD_EXTENSIONS = [
     TocExtension(permalink=True),
     "nl2br",
 ]
+_MD = markdown.Markdown(extensions=MD_EXTENSIONS)
+_MD_LOCK = threading.Lock()
+
+# cmark post-pass: heading anchors/toc and Pygments highlighting, matching
+# what the TocExtension/CodeHiliteExtension output looks like.
+_HEADING_RE = re.compile(r"<h([1-4])>(.*?)</h\1>", re.DOTALL)
+_CODE_RE = re.compile(r'<pre lang="([^"]+)"><code>(.*?)</code></pre>', re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_PYGMENTS_FORMATTER = HtmlFormatter(cssclass="highlight")
+# Lexer construction dominates Pygments cost for small blocks; docs reuse a
+# handful of languages, so cache the instances (they're stateless per call).
+_get_lexer = lru_cache(maxsize=32)(get_lexer_by_name)
+
+
+def _slugify(text: str) -> str:
+    text = _TAG_RE.sub("", text)
+    return re.sub(r"[\s]+", "-", re.sub(r"[^\w\s-]", "", text).strip().lower())
+
+
+def _highlight_block(match: "re.Match[str]") -> str:
+    lang, code = match.group(1), unescape(match.group(2))
+    try:
+        lexer = _get_lexer(lang)
+    except Exception:
+        return match.group(0)
+    return highlight(code, lexer, _PYGMENTS_FORMATTER)
+
+
+def _render_cmark(text: str) -> tuple[str, str]:
+    """Render via cmark-gfm, return (html, toc)."""
+    opts = (
+        cmarkgfm.Options.CMARK_OPT_UNSAFE
+        | cmarkgfm.Options.CMARK_OPT_HARDBREAKS
+        | cmarkgfm.Options.CMARK_OPT_GITHUB_PRE_LANG
+    )
+    html = cmarkgfm.github_flavored_markdown_to_html(text, options=opts)
+    html = _CODE_RE.sub(_highlight_block, html)
+
+    headings: list[tuple[int, str, str]] = []
+    seen_ids: set[str] = set()
+
+    def _anchor(match: "re.Match[str]") -> str:
+        level, inner = int(match.group(1)), match.group(2)
+        # cmark output is entity-escaped; unescape once so slugs and toc
+        # titles are computed from the real text ("Web & iOS" →
+        # web-ios, not web-amp-ios). The toc emitter re-escapes for HTML.
+        plain = unescape(_TAG_RE.sub("", inner)).strip()
+        hid = _slugify(plain) or "section"
+        if hid in seen_ids:
+            # Same _1/_2 suffix scheme as TocExtension, so repeated
+            # headings keep their old deep-link ids
+            n = 1
+            while f"{hid}_{n}" in seen_ids:
+                n += 1
+            hid = f"{hid}_{n}"
+        seen_ids.add(hid)
+        headings.append((level, hid, plain))
+        permalink = (
+            f'<a class="headerlink" href="#{hid}" title="Permanent link">&para;</a>'
+        )
+        return f'<h{level} id="{hid}">{inner}{permalink}</h{level}>'
+
+    html = _HEADING_RE.sub(_anchor, html)
+
+    # Nested <ul> toc over h2/h3, same shape as TocExtension's output.
+    toc_items = [(lvl, hid, title) for lvl, hid, title in headings if lvl in (2, 3)]
+    if not toc_items:
+        return html, ""
+    # The first item's level is the base: levels above it are clamped down,
+    # so a doc whose first heading is an h3 still yields well-formed nesting.
+    base = toc_items[0][0]
+    toc_parts = ['<div class="toc">']
+    prev = base - 1
+    for lvl, hid, title in toc_items:
+        lvl = max(lvl, base)
+        if lvl > prev:
+            toc_parts.append("<ul>" * (lvl - prev))
+        else:
+            toc_parts.append("</li>")
+            toc_parts.append("</ul></li>" * (prev - lvl))
+        toc_parts.append(f'<li><a href="#{hid}">{escape(title)}</a>')
+        prev = lvl
+    toc_parts.append("</li>")
+    toc_parts.append("</ul></li>" * (prev - base))
+    toc_parts.append("</ul></div>")
+    return html, "".join(toc_parts)
+
+
+# Rendered-markdown cache: (path, mtime_ns) → {html, toc, title}.
+# Entries self-invalidate when the source file changes (new mtime = new key).
+_MD_CACHE: dict[tuple[str, int], dict] = {}
 
 
 def render_md(filepath: Path) -> dict:
     """Render a markdown file, return {html, toc, title}."""
+    key = (str(filepath), filepath.stat().st_mtime_ns)
+    cached = _MD_CACHE.get(key)
+    if cached is not None:
+        return cached
     text = filepath.read_text()
-    md = markdown.Markdown(extensions=MD_EXTENSIONS)
-    html = md.convert(text)
-    toc = getattr(md, "toc", "")
-    # Extract title from first H1
+    if cmarkgfm is not None:
+        html, toc = _render_cmark(text)
+    else:
+        with _MD_LOCK:
+            _MD.reset()
+            html = _MD.convert(text)
+            toc = getattr(_MD, "toc", "")
+    # Extract title from first H1 — str.find instead of splitlines() so we
+    # don't copy the whole document into a list just to read one line.
     title = "freeq"
-    for line in text.splitlines():
-        if line.startswith("# "):
-            title = line[2:].strip()
-            break
-    md.reset()
-    return {"html": html, "toc": toc, "title": title}
+    if text.startswith("# "):
+        nl = text.find("\n")
+        title = text[2 : nl if nl != -1 else len(text)].strip()
+    else:
+        idx = text.find("\n# ")
+        if idx != -1:
+            start = idx + 3
+            nl = text.find("\n", start)
+            title = text[start : nl if nl != -1 else len(text)].strip()
+    result = {"html": html, "toc": toc, "title": title, "mtime_ns": key[1]}
+    _MD_CACHE[key] = result
+    return result
 
 
 # ── Slug → file mapping ──────────────────────────────────────────
@@ -99,6 +256,61 @@ SLUG_MAP = {
     "self-hosting-e2e": ("site", "SELF-HOSTING-END-TO-END.md"),
 }
 
+# Frozen slug → resolved Path map: the source/filename branch and path join
+# happen once here instead of per lookup, and MappingProxyType keeps route
+# code from mutating the doc set at runtime.
+_SLUG_TO_PATH = MappingProxyType(
+    {
+        slug: (SITE_DOCS_DIR if source == "site" else REPO_DOCS_DIR) / filename
+        for slug, (source, filename) in SLUG_MAP.items()
+    }
+)
+
+# Pre-rendered docs: slug → {html, toc, title}. The doc set is static, so
+# all parsing happens once at startup and docs_page is a dict lookup.
+_RENDERED: dict[str, dict] = {}
+
+
+# Final pages written to disk so docs_page can send_file them: the body
+# then goes pagecache → socket via wsgi.file_wrapper/sendfile(2) without
+# passing through Python.
+_RENDERED_DIR = Path(__file__).parent / "_rendered"
+
+# Pre-joined, stringified per-slug paths: docs_page hands these straight to
+# os.stat/send_file without building a Path per request.
+_PRERENDERED_PATHS = MappingProxyType(
+    {slug: str(_RENDERED_DIR / f"{slug}.html") for slug in SLUG_MAP}
+)
+
+
+def _build_rendered() -> None:
+    """(Re)render every doc in SLUG_MAP into _RENDERED."""
+    for slug, filepath in _SLUG_TO_PATH.items():
+        # EAFP: let the open fail rather than paying a separate exists() stat
+        try:
+            _RENDERED[slug] = render_md(filepath)
+        except FileNotFoundError:
+            continue
+
+
+def _write_prerendered() -> None:
+    """Write each doc's final page under _rendered/ (atomic per file)."""
+    try:
+        _RENDERED_DIR.mkdir(exist_ok=True)
+        with app.test_request_context():
+            for slug, doc in _RENDERED.items():
+                dest = _RENDERED_DIR / f"{slug}.html"
+                tmp = dest.with_name(dest.name + ".tmp")
+                tmp.write_text(render_template("doc_page.html", doc=doc))
+                os.replace(tmp, dest)
+    except OSError:
+        # Read-only deploys still work — docs_page falls back to live render
+        pass
+
+
+_build_rendered()
+_write_prerendered()
+
 
 # ── Routes ────────────────────────────────────────────────────────
 
@@ -135,46 +347,76 @@ def docs_index():
 
 @app.route("/docs/<path:slug>/")
 def docs_page(slug):
-    """Render a doc page from either site or repo docs."""
-    entry = SLUG_MAP.get(slug)
-    if not entry:
+    """Serve a pre-rendered doc page."""
+    doc = _RENDERED.get(slug)
+    if doc is None:
         abort(404)
-    source, filename = entry
-    if source == "site":
-        filepath = SITE_DOCS_DIR / filename
-    else:
-        filepath = REPO_DOCS_DIR / filename
-    if not filepath.exists():
-        # Return helpful 404 with debug info
-        import json
-        info = {
-            "slug": slug,
-            "source": source,
-            "filename": filename,
-            "filepath": str(filepath),
-            "exists": filepath.exists(),
-            "site_docs_dir": str(SITE_DOCS_DIR),
-            "site_docs_exists": SITE_DOCS_DIR.exists(),
-            "site_docs_files": sorted(f.name for f in SITE_DOCS_DIR.iterdir()) if SITE_DOCS_DIR.exists() else [],
-        }
-        return f"<pre>Doc not found:\n{json.dumps(info, indent=2)}</pre>", 404
-    doc = render_md(filepath)
-    return render_template("doc_page.html", doc=doc)
+    # Fast path: ship the pre-rendered file with sendfile(2); conditional=True
+    # gives ETag/Last-Modified/Range handling for free.
+    prerendered = _PRERENDERED_PATHS[slug]
+    try:
+        if os.stat(prerendered).st_mtime_ns >= doc["mtime_ns"]:
+            resp = send_file(prerendered, mimetype="text/html", conditional=True)
+            resp.headers["Cache-Control"] = "public, max-age=60, must-revalidate"
+            return resp
+    except OSError:
+        pass
+    # Conditional response: browsers/CDNs revalidate with If-None-Match and
+    # get a bodyless 304 when the source file hasn't changed.
+    etag = f'W/"{doc["mtime_ns"]:x}-{len(slug)}"'
+    if request.headers.get("If-None-Match") == etag:
+        return "", 304
+    resp = make_response(render_template("doc_page.html", doc=doc))
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = "public, max-age=60, must-revalidate"
+    return resp
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Re-render all docs from disk (dev convenience)."""
+    # Debug-only: checked per request because app.debug is set by
+    # app.run(debug=True), after routes are registered.
+    if not app.debug:
+        abort(404)
+    _build_rendered()
+    _write_prerendered()
+    return jsonify({"reloaded": len(_RENDERED)})
+
+
+# Directory listings for the debug endpoint, cached on the directory's
+# mtime so repeat hits (health checkers) cost one stat, not a readdir+sort.
+_LIST_CACHE: dict[str, tuple[int, list[str]]] = {}
+
+
+def _listing(p: Path) -> list[str]:
+    mt = p.stat().st_mtime_ns
+    hit = _LIST_CACHE.get(str(p))
+    if hit is not None and hit[0] == mt:
+        return hit[1]
+    val = sorted(f.name for f in p.iterdir())
+    _LIST_CACHE[str(p)] = (mt, val)
+    return val
 
 
 @app.route("/debug/docs")
 def debug_docs():
-    import json
     result = {
         "site_docs_dir": str(SITE_DOCS_DIR),
         "site_docs_exists": SITE_DOCS_DIR.exists(),
-        "site_docs_files": sorted(f.name for f in SITE_DOCS_DIR.iterdir()) if SITE_DOCS_DIR.exists() else [],
+        "site_docs_files": _listing(SITE_DOCS_DIR) if SITE_DOCS_DIR.exists() else [],
         "repo_docs_dir": str(REPO_DOCS_DIR),
         "repo_docs_exists": REPO_DOCS_DIR.exists(),
         "app_file": str(Path(__file__)),
         "cwd": str(Path.cwd()),
     }
-    return json.dumps(result, indent=2), 200, {"Content-Type": "application/json"}
+    if orjson is not None:
+        body = orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+    else:
+        import json
+
+        body = json.dumps(result, indent=2)
+    return body, 200, {"Content-Type": "application/json"}
 
 
 @app.route("/.well-known/<path:filename>")
@@ -184,8 +426,35 @@ def well_known(filename):
 
 @app.route("/favicon.ico")
 def favicon():
-    return "", 204
+    # Dev fallback — in production put the front proxy/CDN in front of
+    # static/ so this never reaches Python.
+    resp = send_from_directory(Path(app.static_folder), "favicon.ico")
+    resp.headers["Cache-Control"] = "public, max-age=604800"
+    return resp
+
+
+def build_static(outdir: str) -> int:
+    """Write every rendered doc to <outdir>/docs/<slug>/index.html.
+
+    Lets a front proxy serve doc pages straight from disk (try_files)
+    with Flask only as the fallback.
+    """
+    out = Path(outdir)
+    count = 0
+    with app.test_request_context():
+        for slug, doc in _RENDERED.items():
+            dest = out / "docs" / slug / "index.html"
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            dest.write_text(render_template("doc_page.html", doc=doc))
+            count += 1
+    return count
 
 
 if __name__ == "__main__":
-    app.run(debug=True, port=8000)
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "build-static":
+        outdir = sys.argv[2] if len(sys.argv) > 2 else "dist"
+        print(f"Wrote {build_static(outdir)} doc pages to {outdir}/docs/")
+    else:
+        app.run(debug=True, port=8000)
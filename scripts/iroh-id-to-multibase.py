@@ -24,20 +24,39 @@ ED25519_PREFIX = bytes([0xed, 0x01])
 # Base58 alphabet (Bitcoin/IPFS variant)
 B58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 
+# Optional: the `base58` package (pip install base58) is much faster than
+# the fallback below — worth having for batch use, not required.
+try:
+    from base58 import b58encode as _b58encode_lib
+except ImportError:
+    _b58encode_lib = None
+
+
+# One bignum division by 58**10 yields ten base58 digits, so the expensive
+# full-precision divmod runs ~10x less often than dividing by 58 directly.
+B58_POW10 = 58**10
+
 
 def b58encode(data: bytes) -> str:
-    """Base58 encode (no external deps)."""
+    """Base58 encode — `base58` package when installed, pure Python otherwise."""
+    if _b58encode_lib is not None:
+        return _b58encode_lib(data).decode()
     n = int.from_bytes(data, "big")
-    result = []
+    digits = bytearray()
     while n > 0:
-        n, r = divmod(n, 58)
-        result.append(B58_ALPHABET[r : r + 1])
+        n, chunk = divmod(n, B58_POW10)
+        for _ in range(10):
+            chunk, r = divmod(chunk, 58)
+            digits.append(B58_ALPHABET[r])
+    # Drop the zero digits over-emitted by the most significant block.
+    while digits and digits[-1] == B58_ALPHABET[0]:
+        digits.pop()
     for byte in data:
         if byte == 0:
-            result.append(b"1")
+            digits.append(B58_ALPHABET[0])
         else:
             break
-    return b"".join(reversed(result)).decode()
+    return bytes(reversed(digits)).decode()
 
 
 def ed25519_pubkey_from_secret(secret_bytes: bytes) -> bytes:
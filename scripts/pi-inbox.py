@@ -1,11 +1,31 @@
 #!/usr/bin/env python3
-import json
 import os
 import time
 
+# orjson parses ~5x faster than stdlib json; fall back if not installed.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+# Kernel file-change notification beats polling: zero CPU at idle, no
+# added latency. Falls back to the sleep loop where unavailable.
+try:
+    from inotify_simple import INotify, flags as _inotify_flags
+except ImportError:
+    INotify = None
+
 OUTBOX = os.environ.get("PI_OUTBOX", "/tmp/freeq-pi-queue.jsonl")
 STATE = os.environ.get("PI_INBOX_STATE", "/tmp/freeq-pi-queue.offset")
 POLL = float(os.environ.get("PI_INBOX_POLL", "0.5"))
+# Safety-net wakeup for filesystems where inotify doesn't fire (e.g. NFS)
+FALLBACK_POLL = float(os.environ.get("PI_INBOX_FALLBACK_POLL", "30"))
 
 
 def load_offset() -> int:
@@ -27,33 +47,58 @@ def save_offset(offset: int) -> None:
 
 def main() -> None:
     offset = load_offset()
+    last_saved = offset
+    inot = None
+    if INotify is not None:
+        try:
+            inot = INotify()
+            inot.add_watch(
+                os.path.dirname(OUTBOX) or ".",
+                _inotify_flags.MODIFY | _inotify_flags.CREATE | _inotify_flags.MOVED_TO,
+            )
+        except OSError:
+            inot = None
     while True:
         try:
-            with open(OUTBOX, "a+", encoding="utf-8") as f:
+            # Binary mode: byte-exact offsets, and the JSON decoder takes the
+            # raw bytes directly — no per-line UTF-8 decode in the hot loop.
+            with open(OUTBOX, "a+b") as f:
+                # Tell the kernel we read straight through — doubles readahead
+                # on large catchup scans. Advisory only; ignore where missing.
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except (AttributeError, OSError):
+                    pass
                 f.seek(0, os.SEEK_END)
                 end = f.tell()
                 if end < offset:
                     offset = 0
                 f.seek(offset)
-                data = f.read()
-                if data:
-                    for line in data.splitlines():
-                        if not line.strip():
-                            continue
-                        try:
-                            entry = json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
-                        ts = entry.get("ts")
-                        did = entry.get("did")
-                        text = entry.get("text")
-                        target = entry.get("target")
-                        print(f"[pi:{target}] {text} (did={did}, ts={ts})", flush=True)
+                # Stream line by line instead of read()+splitlines(): no
+                # full-region copy in memory during large catchup reads.
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = _loads(line)
+                    except _JSONDecodeError:
+                        continue
+                    ts = entry.get("ts")
+                    did = entry.get("did")
+                    text = entry.get("text")
+                    target = entry.get("target")
+                    print(f"[pi:{target}] {text} (did={did}, ts={ts})", flush=True)
                 offset = f.tell()
-                save_offset(offset)
+                # Don't rewrite the state file on idle ticks
+                if offset != last_saved:
+                    save_offset(offset)
+                    last_saved = offset
         except FileNotFoundError:
             pass
-        time.sleep(POLL)
+        if inot is not None:
+            inot.read(timeout=int(FALLBACK_POLL * 1000))
+        else:
+            time.sleep(POLL)
 
 
 if __name__ == "__main__":
@@ -11,7 +11,6 @@ fifo = sys.argv[1]
 
 # Open FIFO for reading (non-blocking)
 fd_fifo = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
-file_fifo = os.fdopen(fd_fifo, "r", buffering=1)
 
 # stdin
 fd_stdin = sys.stdin.fileno()
@@ -21,17 +20,25 @@ sel = selectors.DefaultSelector()
 sel.register(fd_stdin, selectors.EVENT_READ, "stdin")
 sel.register(fd_fifo, selectors.EVENT_READ, "fifo")
 
+# Raw os.read/os.write: one bulk kernel→user copy per event, no text-mode
+# decoding or line buffering in between. stdin passes through verbatim;
+# FIFO data is held in a buffer so only newline-terminated lines go out
+# (a trailing newline is appended if the writer closes mid-line).
+fifo_buf = bytearray()
+
 while True:
     for key, _ in sel.select():
+        data = os.read(key.fd, 65536)
         if key.data == "stdin":
-            data = sys.stdin.read()
             if data:
-                sys.stdout.write(data)
-                sys.stdout.flush()
-        else:
-            line = file_fifo.readline()
-            if line:
-                sys.stdout.write(line)
-                if not line.endswith("\n"):
-                    sys.stdout.write("\n")
-                sys.stdout.flush()
+                os.write(1, data)
+        elif data:
+            fifo_buf += data
+            nl = fifo_buf.rfind(b"\n")
+            if nl != -1:
+                os.write(1, fifo_buf[: nl + 1])
+                del fifo_buf[: nl + 1]
+        elif fifo_buf:
+            fifo_buf += b"\n"
+            os.write(1, fifo_buf)
+            fifo_buf.clear()